@@ -1,7 +1,7 @@
 // src/components/RouteFinder.jsx
-import React, { useContext, useCallback } from 'react';
+import React, { useContext, useCallback, useEffect } from 'react';
 import { AppStateContext } from '../context/AppStateContext';
-import { findRoutes } from '../utils/api'; // Import the final api function
+import { findRoutes, abortActiveSearch } from '../utils/api'; // Import the final api function
 import { processRouteForElevation } from '../utils/geoUtils'; // To process the results
 import Controls from './panels/Controls';
 import MapView from './panels/MapView';
@@ -31,18 +31,28 @@ const RouteFinder = () => {
 
       // 3. Update the global state with the final, processed routes
       setRoutes(routesWithProfiles);
-      setSearchStatus('success');
+      setSearchStatus(result.status === 'partial' ? 'partial' : 'success');
 
     } catch (error) {
+      // A newer search replaced this one; leave the state to the newer search
+      if (error.cancelled) return;
       setErrorMessage(error.message);
       setSearchStatus('error');
     }
   }, [searchParams, setSearchStatus, setRoutes, setSelectedRouteId, setErrorMessage]);
 
+  const handleCancelSearch = useCallback(() => {
+    abortActiveSearch();
+    setSearchStatus('idle');
+  }, [setSearchStatus]);
+
+  // Stop any in-flight search when leaving the route finder
+  useEffect(() => abortActiveSearch, []);
+
   return (
     <div className={styles.container}>
       <div className={styles.mapView}><MapView /></div>
-      <div className={styles.controls}><Controls onFindRoutes={handleFindRoutes} /></div>
+      <div className={styles.controls}><Controls onFindRoutes={handleFindRoutes} onCancelSearch={handleCancelSearch} /></div>
       <div className={styles.elevationProfile}><ElevationProfile /></div>
       <div className={styles.statusBar}><StatusBar /></div>
     </div>
@@ -3,7 +3,7 @@ import React, { useContext } from 'react';
 import { AppStateContext } from '../../context/AppStateContext';
 import styles from '../../styles/Controls.module.css';
 
-const Controls = ({ onFindRoutes }) => {
+const Controls = ({ onFindRoutes, onCancelSearch }) => {
   // Destructure all the necessary state and functions from the global context
   const { 
     searchParams, 
@@ -63,13 +63,21 @@ const Controls = ({ onFindRoutes }) => {
       
       {/* Group for the main action button */}
       <div className={styles.group}>
+        {/* Stays enabled while searching: a new search replaces the pending one */}
         <button
           className={styles.findButton}
           onClick={onFindRoutes}
-          disabled={isSearching}
         >
-          {isSearching ? 'Searching...' : 'Find Routes'}
+          {isSearching ? 'Search Again' : 'Find Routes'}
         </button>
+        {isSearching && (
+          <button
+            className={styles.cancelButton}
+            onClick={onCancelSearch}
+          >
+            Cancel Search
+          </button>
+        )}
       </div>
 
       {/* This group only appears after a successful search */}
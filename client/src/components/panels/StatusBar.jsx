@@ -13,6 +13,8 @@ const StatusBar = () => {
     message = 'Searching for routes... this may take a moment.';
   } else if (searchStatus === 'success') {
     message = `Search complete. Found ${routes.length} matching routes.`;
+  } else if (searchStatus === 'partial') {
+    message = `Search stopped early (time limit reached). Showing ${routes.length} routes found so far.`;
   } else if (searchStatus === 'error') {
     message = `Error: ${errorMessage}`;
   }
@@ -13,7 +13,7 @@ export const AppStateProvider = ({ children }) => {
   });
 
   // State to track the status of the API call
-  const [searchStatus, setSearchStatus] = useState('idle'); // 'idle', 'pending', 'success', 'error'
+  const [searchStatus, setSearchStatus] = useState('idle'); // 'idle', 'pending', 'success', 'partial', 'error'
   const [errorMessage, setErrorMessage] = useState('');
 
   // State for the results returned from the backend
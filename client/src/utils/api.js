@@ -1,33 +1,94 @@
 // src/utils/api.js
 
 // The base URL of your running Flask server
-const API_BASE_URL = 'http://localhost:5000'; 
+const API_BASE_URL = 'http://localhost:5000';
+
+// A random ID generated once per page load (so once per tab). The server uses it
+// to let a new search from this tab supersede the previous one.
+const makeId = () => (
+  window.crypto && window.crypto.randomUUID
+    ? window.crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+);
+const CLIENT_ID = makeId();
+
+// The search currently in flight from this tab, if any
+let activeSearch = null;
+
+/**
+ * Tells the server to stop a search this tab no longer needs.
+ * keepalive lets the request finish even while the page is unloading.
+ * @param {string} searchId - The ID of the search to cancel.
+ */
+export const cancelSearch = (searchId) => {
+  return fetch(`${API_BASE_URL}/api/cancel-search`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ clientId: CLIENT_ID, searchId }),
+    keepalive: true,
+  }).catch((error) => console.error("Error cancelling search:", error));
+};
+
+/**
+ * Aborts the in-flight search, if any, and asks the server to stop working on it.
+ */
+export const abortActiveSearch = () => {
+  if (!activeSearch) return;
+  const { controller, searchId } = activeSearch;
+  activeSearch = null;
+  controller.abort();
+  cancelSearch(searchId);
+};
+
+// Stop server-side work when the tab is closed or navigated away mid-search
+window.addEventListener('pagehide', abortActiveSearch);
 
 /**
  * Calls the final backend endpoint to find routes based on search parameters.
+ * Starting a new search aborts the previous one from this tab. A superseded
+ * search rejects with an error whose `cancelled` property is true.
  * @param {object} searchParams - The complete search parameters object from the context.
  * @returns {Promise<object>} - A promise that resolves to the API response.
  */
 export const findRoutes = async (searchParams) => {
+  abortActiveSearch();
+
+  const search = { controller: new AbortController(), searchId: makeId() };
+  activeSearch = search;
+
   try {
     const response = await fetch(`${API_BASE_URL}/api/find-routes`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
-      // Send the entire searchParams object in the body
-      body: JSON.stringify(searchParams), 
+      // Send the entire searchParams object in the body, tagged with this tab and search
+      body: JSON.stringify({ ...searchParams, clientId: CLIENT_ID, searchId: search.searchId }),
+      signal: search.controller.signal,
     });
 
     if (!response.ok) {
       const errorData = await response.json();
-      throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
+      const error = new Error(errorData.error || `HTTP error! status: ${response.status}`);
+      error.cancelled = errorData.status === 'cancelled';
+      throw error;
     }
 
     return await response.json();
 
   } catch (error) {
-    console.error("Error finding routes:", error);
-    throw error; 
+    if (error.name === 'AbortError') {
+      error.cancelled = true;
+    }
+    if (!error.cancelled) {
+      console.error("Error finding routes:", error);
+    }
+    throw error;
+  } finally {
+    if (activeSearch === search) {
+      activeSearch = null;
+    }
   }
-};
\ No newline at end of file
+};
@@ -1,10 +1,15 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import logging
+import os
+import psycopg2
 
 # Import the main orchestrator and the final engine
 from core.data_pipeline import prepare_data_for_pathfinding
+from core.graph_store import PostgresGraphStore
 from core.pathfinder import PathfindingEngine
+from core.request_control import BudgetExceeded, RequestBudget, RequestCancelled
+from core.search_registry import PostgresSearchRegistry, SearchRegistry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -18,6 +23,33 @@ CORS(app, resources={
     }
 })
 
+# Per-request resource limits for /api/find-routes
+MAX_GRAPH_NODES = 50_000
+MAX_ELEVATION_POINTS = 50_000
+MAX_REQUEST_SECONDS = 180
+
+# Shared PostgreSQL graph store, enabled by setting GRAPH_STORE_DSN.
+# Create its schema first with: python -m core.graph_store
+GRAPH_STORE_DSN = os.environ.get('GRAPH_STORE_DSN')
+graph_store = None
+if GRAPH_STORE_DSN:
+    try:
+        graph_store = PostgresGraphStore(GRAPH_STORE_DSN)
+    except psycopg2.Error as e:
+        logging.error(f"Graph store unavailable, continuing without it: {e}")
+
+# In-flight searches, keyed by the per-tab clientId the frontend sends, so a new
+# search can cancel the one it supersedes. With a database configured the registry
+# is shared by every worker and instance; without one it only sees searches in
+# this process, so a supersede or cancel that lands on another worker is missed.
+SEARCH_REGISTRY_DSN = os.environ.get('SEARCH_REGISTRY_DSN', GRAPH_STORE_DSN)
+search_registry = SearchRegistry()
+if SEARCH_REGISTRY_DSN:
+    try:
+        search_registry = PostgresSearchRegistry(SEARCH_REGISTRY_DSN)
+    except psycopg2.Error as e:
+        logging.error(f"Shared search registry unavailable, cancellation is per-process: {e}")
+
 @app.route("/")
 def home():
     return jsonify({"message": "This is the API."})
@@ -33,10 +65,21 @@ def find_routes_endpoint():
     if not search_params:
         return jsonify({"error": "Invalid request: Missing JSON body"}), 400
 
+    client_id = search_params.get('clientId')
+    search_id = search_params.get('searchId')
+    cancel_token = search_registry.register(client_id, search_id)
+    budget = RequestBudget(
+        max_nodes=MAX_GRAPH_NODES,
+        max_elevation_points=MAX_ELEVATION_POINTS,
+        max_wall_time_seconds=MAX_REQUEST_SECONDS,
+    )
+
     try:
         # Step 1: Prepare all the data (fetch OSM, build graph, get elevation)
         logging.info("--- Starting Data Preparation ---")
-        enriched_graph = prepare_data_for_pathfinding(search_params)
+        enriched_graph = prepare_data_for_pathfinding(
+            search_params, cancel_token=cancel_token, budget=budget, graph_store=graph_store
+        )
         
         if not enriched_graph or enriched_graph.number_of_nodes() == 0:
             logging.error("Failed to build the enriched graph.")
@@ -44,19 +87,61 @@ def find_routes_endpoint():
         
         # Step 2: Run the pathfinding algorithm on the prepared data
         logging.info("--- Starting Pathfinding Engine ---")
-        engine = PathfindingEngine(graph=enriched_graph, search_params=search_params)
+        engine = PathfindingEngine(
+            graph=enriched_graph, search_params=search_params, cancel_token=cancel_token, budget=budget
+        )
         found_routes = engine.find_routes()
 
-        # Step 3: Return the results
+        # Step 3: Return the results (partial if the search was stopped early)
         logging.info(f"--- Process Complete. Found {len(found_routes)} routes. ---")
+        if engine.stopped_reason:
+            return jsonify({
+                "status": "partial",
+                "reason": engine.stopped_reason,
+                "routes": found_routes
+            }), 200
+
         return jsonify({
             "status": "success",
             "routes": found_routes
         }), 200
 
+    except RequestCancelled as e:
+        logging.info(f"Search for {client_id} cancelled: {e.reason}")
+        return jsonify({"status": "cancelled", "error": e.reason}), 409
+    except BudgetExceeded as e:
+        logging.warning(f"Search for {client_id} over budget: {e}")
+        return jsonify({
+            "status": "over_budget",
+            "error": "The selected area is too large to search. Try a smaller search radius or path distance.",
+            "resource": e.resource,
+            "limit": e.limit,
+            "used": e.used
+        }), 422
     except Exception as e:
         logging.critical(f"An unexpected error occurred in the main endpoint: {e}", exc_info=True)
         return jsonify({"error": "An internal server error occurred"}), 500
+    finally:
+        search_registry.unregister(client_id, search_id, cancel_token)
+
+@app.route("/api/cancel-search", methods=['POST'])
+def cancel_search_endpoint():
+    """
+    Cancels an in-flight search when the client aborts it or the page unloads.
+    Both clientId and searchId must match the running search, so a late cancel
+    can never stop the newer search that replaced it. With the shared registry
+    the search may be running on any worker; it stops within a poll interval.
+    """
+    cancel_params = request.get_json(silent=True) or {}
+    client_id = cancel_params.get('clientId')
+    search_id = cancel_params.get('searchId')
+    if not client_id or not search_id:
+        return jsonify({"error": "Invalid request: 'clientId' and 'searchId' are required"}), 400
+
+    if not search_registry.cancel(client_id, search_id):
+        return jsonify({"status": "no_active_search"}), 200
+
+    return jsonify({"status": "cancelled"}), 200
 
 
 if __name__ == '__main__':
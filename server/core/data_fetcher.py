@@ -3,6 +3,7 @@ import requests
 import json
 import logging
 import time
+from core.request_control import check_request, raise_for_timeout, request_timeout
 
 # --- NEW HELPER FUNCTION ---
 def process_elevation_request(request_data):
@@ -67,18 +68,24 @@ class ElevationConnector:
         }
         self.batch_size = batch_size
 
-    def fetch_elevation_for_coords(self, coordinates):
+    def fetch_elevation_for_coords(self, coordinates, cancel_token=None, budget=None):
         """
         Fetches elevation data for a list of coordinates, automatically handling batching.
+        If a cancel_token or budget is given, it is checked before every batch and
+        RequestCancelled / BudgetExceeded propagate to the caller.
         """
         if not coordinates:
             logging.error("Error: No coordinates provided to ElevationConnector.")
             return None
 
+        if budget is not None:
+            budget.check_elevation_points(len(coordinates))
+
         all_results = []
         
         # Split the coordinates into smaller chunks (batches)
         for i in range(0, len(coordinates), self.batch_size):
+            check_request(cancel_token, budget)
             batch = coordinates[i:i + self.batch_size]
             logging.info(f"Fetching batch {i // self.batch_size + 1} of {len(coordinates) // self.batch_size + 1}...")
             
@@ -88,7 +95,8 @@ class ElevationConnector:
                 response = requests.post(
                     self.api_url, 
                     headers=self.headers, 
-                    data=json.dumps(payload)
+                    data=json.dumps(payload),
+                    timeout=request_timeout(budget)
                 )
                 response.raise_for_status()
                 data = response.json()
@@ -99,8 +107,17 @@ class ElevationConnector:
                     all_results.extend(batch_results)
                 
                 # Be a good citizen and pause briefly between requests
-                time.sleep(1)
+                # (waking early if the request is cancelled in the meantime)
+                if cancel_token is not None:
+                    cancel_token.wait(1)
+                else:
+                    time.sleep(1)
 
+            except requests.exceptions.Timeout as timeout_err:
+                # A timeout usually means the request's time budget ran out
+                raise_for_timeout(cancel_token, budget)
+                logging.error(f"Timeout on batch: {timeout_err}")
+                return all_results if all_results else None
             except requests.exceptions.HTTPError as http_err:
                 logging.error(f"HTTP error on batch: {http_err} - {response.text}")
                 # Decide if you want to stop or continue on a failed batch
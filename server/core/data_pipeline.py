@@ -1,12 +1,18 @@
 # core/data_pipeline.py
 import logging
+import psycopg2
 from core.road_network import OSMConnector, build_road_graph
 from core.data_fetcher import ElevationConnector
+from core.request_control import check_request
 from utils.geo_utils import get_bounding_box
 
-def prepare_data_for_pathfinding(search_params):
+def prepare_data_for_pathfinding(search_params, cancel_token=None, budget=None, graph_store=None):
     """
     Orchestrates the entire data preparation process.
+    The optional cancel_token and budget are handed to every stage; a cancelled or
+    over-budget request raises RequestCancelled / BudgetExceeded out of this function.
+    If a graph_store is given, areas it already covers are served from it and
+    newly prepared graphs are saved to it for other instances.
     """
     # Step 1: Define Bounding Box
     origin = search_params.get('origin', {'lat': 36.51, 'lng': -82.53})
@@ -18,15 +24,22 @@ def prepare_data_for_pathfinding(search_params):
     
     bbox = get_bounding_box(origin['lat'], origin['lng'], total_fetch_radius)
 
-    # ... (The rest of the function remains the same) ...
-    
+    if graph_store is not None:
+        try:
+            if graph_store.covers(bbox):
+                logging.info("Serving enriched graph from the shared graph store.")
+                return graph_store.load_subgraph(bbox, cancel_token=cancel_token, budget=budget)
+        except psycopg2.Error as e:
+            # The store is only a shortcut; fall back to fetching fresh data
+            logging.error(f"Graph store lookup failed, fetching fresh data: {e}")
+
     # Step 2: Fetch Road Network
     osm_connector = OSMConnector()
-    osm_data = osm_connector.get_road_network(bbox)
+    osm_data = osm_connector.get_road_network(bbox, cancel_token=cancel_token, budget=budget)
     if not osm_data: return None
 
     # Step 3: Build High-Resolution Graph
-    road_graph = build_road_graph(osm_data)
+    road_graph = build_road_graph(osm_data, cancel_token=cancel_token, budget=budget)
     if road_graph.number_of_nodes() == 0: return None
     
     # Step 4: Fetch Elevation Data
@@ -37,7 +50,9 @@ def prepare_data_for_pathfinding(search_params):
     ]
     
     elevation_connector = ElevationConnector()
-    elevation_results = elevation_connector.fetch_elevation_for_coords(coordinates_to_fetch)
+    elevation_results = elevation_connector.fetch_elevation_for_coords(
+        coordinates_to_fetch, cancel_token=cancel_token, budget=budget
+    )
     if not elevation_results: return None
 
     elevation_map = {
@@ -46,6 +61,7 @@ def prepare_data_for_pathfinding(search_params):
     }
 
     # Step 5: Enrich the Graph
+    check_request(cancel_token, budget)
     nodes_to_remove = []
     for node_id, data in all_nodes:
         lat, lon = round(data['lat'], 6), round(data['lon'], 6)
@@ -59,4 +75,18 @@ def prepare_data_for_pathfinding(search_params):
     road_graph.remove_nodes_from(nodes_to_remove)
             
     logging.info(f"Successfully enriched graph. Final node count: {road_graph.number_of_nodes()}")
+
+    # Only a complete graph may be shared: the store would otherwise keep
+    # serving the gaps left by failed elevation batches for the whole bbox.
+    if graph_store is not None and nodes_to_remove:
+        logging.warning(f"Not saving graph to the graph store: {len(nodes_to_remove)} nodes lacked elevation.")
+    elif graph_store is not None:
+        try:
+            # Not checked against the budget or cancel token: the graph is finished,
+            # and saving it is cheap and benefits every other instance.
+            graph_store.save_graph(road_graph, bbox)
+        except psycopg2.Error as e:
+            # The graph is still usable for this request even if sharing it failed
+            logging.error(f"Failed to save graph to the graph store: {e}")
+
     return road_graph
\ No newline at end of file
@@ -0,0 +1,262 @@
+# core/graph_store.py
+import io
+import logging
+from contextlib import contextmanager
+
+import networkx as nx
+from psycopg2.pool import ThreadedConnectionPool
+
+from core.request_control import check_request
+
+# Geometry uses PostgreSQL's built-in point and box types (x = lon, y = lat) with
+# GiST indexes, so the store runs on a stock PostgreSQL install with no extensions.
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS route_nodes (
+        node_id   BIGINT PRIMARY KEY,
+        lat       DOUBLE PRECISION NOT NULL,
+        lon       DOUBLE PRECISION NOT NULL,
+        elevation DOUBLE PRECISION NOT NULL,
+        geom      point NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS route_nodes_geom_idx ON route_nodes USING GIST (geom);
+
+    -- geom is the bounding box of the segment, used for bbox containment queries
+    CREATE TABLE IF NOT EXISTS route_edges (
+        source BIGINT NOT NULL,
+        target BIGINT NOT NULL,
+        weight DOUBLE PRECISION NOT NULL,
+        geom   box NOT NULL,
+        PRIMARY KEY (source, target)
+    );
+    CREATE INDEX IF NOT EXISTS route_edges_geom_idx ON route_edges USING GIST (geom);
+
+    CREATE TABLE IF NOT EXISTS route_coverage (
+        id   BIGSERIAL PRIMARY KEY,
+        geom box NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS route_coverage_geom_idx ON route_coverage USING GIST (geom);
+"""
+
+# Set on the IDs of interpolated nodes. OSM node IDs stay far below 2**62 and
+# coordinate keys below 2**57, so tagged IDs never collide with OSM IDs.
+INTERPOLATED_NODE_TAG = 1 << 62
+
+
+def store_node_id(node_id, data):
+    """
+    Maps a build_road_graph node to its ID in the store. OSM nodes keep their
+    OSM ID, so nodes that merely share a coordinate (bridges, stacked ways)
+    stay separate. Interpolated nodes are numbered per request, which would
+    collide between instances, so they get a tagged ID derived from their
+    coordinates rounded to 6 decimals instead.
+    """
+    if not data.get('interpolated'):
+        return node_id
+    lat_key = int(round(data['lat'] * 1_000_000)) + 90_000_000    # 0 .. 180e6 fits in 28 bits
+    lon_key = int(round(data['lon'] * 1_000_000)) + 180_000_000   # 0 .. 360e6 fits in 29 bits
+    return INTERPOLATED_NODE_TAG | (lat_key << 29) | lon_key
+
+
+def boxes_cover(boxes, bounding_box):
+    """
+    Returns True if the union of boxes contains the bounding box. Both use
+    (south, west, north, east). The area is split into cells along every box
+    edge and each cell's centre must fall inside some box.
+    """
+    south, west, north, east = bounding_box
+    lons = sorted({west, east} | {lon for b in boxes for lon in (b[1], b[3]) if west < lon < east})
+    lats = sorted({south, north} | {lat for b in boxes for lat in (b[0], b[2]) if south < lat < north})
+
+    for lon1, lon2 in zip(lons, lons[1:]):
+        for lat1, lat2 in zip(lats, lats[1:]):
+            mid_lat, mid_lon = (lat1 + lat2) / 2, (lon1 + lon2) / 2
+            if not any(b[0] <= mid_lat <= b[2] and b[1] <= mid_lon <= b[3] for b in boxes):
+                return False
+    return True
+
+
+class PostgresGraphStore:
+    """
+    A PostgreSQL-backed store for enriched road graphs, shared between API instances.
+    Graphs are bulk-loaded with COPY and read back as bbox subgraphs in the
+    same NetworkX format that build_road_graph produces.
+    """
+
+    def __init__(self, dsn, fetch_batch_size=5000, min_connections=1, max_connections=5):
+        self.fetch_batch_size = fetch_batch_size
+        self.pool = ThreadedConnectionPool(min_connections, max_connections, dsn)
+
+    @contextmanager
+    def _connection(self):
+        conn = self.pool.getconn()
+        try:
+            with conn:  # commits on success, rolls back on error
+                yield conn
+        finally:
+            self.pool.putconn(conn)
+
+    def close(self):
+        self.pool.closeall()
+
+    def create_schema(self):
+        """One-off setup step; needs a role allowed to create tables."""
+        with self._connection() as conn, conn.cursor() as cur:
+            cur.execute(SCHEMA_SQL)
+        logging.info("Graph store schema is ready.")
+
+    def clear(self):
+        """Removes every stored node, edge and coverage area."""
+        with self._connection() as conn, conn.cursor() as cur:
+            cur.execute("TRUNCATE route_nodes, route_edges, route_coverage")
+        logging.info("Cleared the graph store.")
+
+    @staticmethod
+    def _covers(cur, bounding_box):
+        south, west, north, east = bounding_box
+        # box[1] is the lower-left corner and box[0] the upper-right one
+        cur.execute(
+            """
+            SELECT (geom[1])[1], (geom[1])[0], (geom[0])[1], (geom[0])[0] FROM route_coverage
+            WHERE geom && box(point(%s, %s), point(%s, %s))
+            """,
+            (west, south, east, north),
+        )
+        return boxes_cover(cur.fetchall(), bounding_box)
+
+    def covers(self, bounding_box):
+        """Returns True if the saved areas together fully contain the bounding box."""
+        with self._connection() as conn, conn.cursor() as cur:
+            return self._covers(cur, bounding_box)
+
+    def save_graph(self, graph, bounding_box):
+        """
+        Bulk-loads an enriched graph into the shared tables and records the
+        bounding box as covered, so the graph must be complete for that box.
+        Nodes without elevation are skipped, along with any edge that touches them.
+        """
+        store_ids = {}
+        node_buffer = io.StringIO()
+        for node_id, data in graph.nodes(data=True):
+            if 'elevation' not in data:
+                continue
+            store_id = store_node_id(node_id, data)
+            store_ids[node_id] = store_id
+            node_buffer.write(f"{store_id}\t{data['lat']!r}\t{data['lon']!r}\t{data['elevation']!r}\n")
+
+        edge_buffer = io.StringIO()
+        edge_count = 0
+        for node1_id, node2_id, data in graph.edges(data=True):
+            if node1_id not in store_ids or node2_id not in store_ids:
+                continue
+            source, target = sorted((store_ids[node1_id], store_ids[node2_id]))
+            if source == target:
+                continue
+            edge_buffer.write(f"{source}\t{target}\t{data['weight']!r}\n")
+            edge_count += 1
+
+        node_buffer.seek(0)
+        edge_buffer.seek(0)
+        south, west, north, east = bounding_box
+
+        with self._connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                CREATE TEMP TABLE staging_nodes (
+                    node_id BIGINT, lat DOUBLE PRECISION, lon DOUBLE PRECISION, elevation DOUBLE PRECISION
+                ) ON COMMIT DROP;
+                CREATE TEMP TABLE staging_edges (
+                    source BIGINT, target BIGINT, weight DOUBLE PRECISION
+                ) ON COMMIT DROP;
+                """
+            )
+            cur.copy_expert("COPY staging_nodes (node_id, lat, lon, elevation) FROM STDIN", node_buffer)
+            cur.copy_expert("COPY staging_edges (source, target, weight) FROM STDIN", edge_buffer)
+
+            # Overlapping areas loaded by different instances share nodes and edges,
+            # so existing rows win and only new ones are inserted.
+            cur.execute(
+                """
+                INSERT INTO route_nodes (node_id, lat, lon, elevation, geom)
+                SELECT DISTINCT ON (node_id) node_id, lat, lon, elevation, point(lon, lat)
+                FROM staging_nodes
+                ON CONFLICT (node_id) DO NOTHING
+                """
+            )
+            cur.execute(
+                """
+                INSERT INTO route_edges (source, target, weight, geom)
+                SELECT DISTINCT ON (e.source, e.target) e.source, e.target, e.weight,
+                       box(n1.geom, n2.geom)
+                FROM staging_edges e
+                JOIN route_nodes n1 ON n1.node_id = e.source
+                JOIN route_nodes n2 ON n2.node_id = e.target
+                ON CONFLICT (source, target) DO NOTHING
+                """
+            )
+            if not self._covers(cur, bounding_box):
+                cur.execute(
+                    "INSERT INTO route_coverage (geom) VALUES (box(point(%s, %s), point(%s, %s)))",
+                    (west, south, east, north),
+                )
+
+        logging.info(f"Saved {len(store_ids)} nodes and {edge_count} edges to the graph store.")
+
+    def load_subgraph(self, bounding_box, cancel_token=None, budget=None):
+        """
+        Reads every node inside the bounding box, and every edge with both ends
+        inside it, into a NetworkX graph ready for PathfindingEngine. Rows are
+        streamed through a server-side cursor in batches of fetch_batch_size.
+        """
+        south, west, north, east = bounding_box
+        envelope = (west, south, east, north)
+        graph = nx.Graph()
+
+        with self._connection() as conn:
+            with conn.cursor(name="subgraph_nodes") as cur:
+                cur.execute(
+                    """
+                    SELECT node_id, lat, lon, elevation FROM route_nodes
+                    WHERE geom <@ box(point(%s, %s), point(%s, %s))
+                    """,
+                    envelope,
+                )
+                while True:
+                    check_request(cancel_token, budget)
+                    rows = cur.fetchmany(self.fetch_batch_size)
+                    if not rows:
+                        break
+                    for node_id, lat, lon, elevation in rows:
+                        graph.add_node(node_id, lat=lat, lon=lon, elevation=elevation)
+                    if budget is not None:
+                        budget.check_nodes(graph.number_of_nodes())
+
+            with conn.cursor(name="subgraph_edges") as cur:
+                # A segment's box lies inside the envelope exactly when both of
+                # its endpoints do.
+                cur.execute(
+                    """
+                    SELECT source, target, weight FROM route_edges
+                    WHERE geom <@ box(point(%s, %s), point(%s, %s))
+                    """,
+                    envelope,
+                )
+                while True:
+                    check_request(cancel_token, budget)
+                    rows = cur.fetchmany(self.fetch_batch_size)
+                    if not rows:
+                        break
+                    for source, target, weight in rows:
+                        graph.add_edge(source, target, weight=weight)
+
+        logging.info(f"Loaded subgraph with {graph.number_of_nodes()} nodes and {graph.number_of_edges()} edges from the graph store.")
+        return graph
+
+
+if __name__ == '__main__':
+    # Setup step, run once per database before enabling the store in the app:
+    #   GRAPH_STORE_DSN="dbname=running_routes" python -m core.graph_store
+    import os
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = PostgresGraphStore(os.environ['GRAPH_STORE_DSN'])
+    store.create_schema()
+    store.close()
@@ -1,6 +1,7 @@
 # core/pathfinder.py
 import logging
 import random
+from core.request_control import BudgetExceeded, check_request
 from utils.geo_utils import haversine_distance
 
 class PathfindingEngine:
@@ -8,9 +9,14 @@ class PathfindingEngine:
     The core engine for finding routes that meet specific criteria.
     It traverses a road network graph where each node has elevation data.
     """
-    def __init__(self, graph, search_params):
+    def __init__(self, graph, search_params, cancel_token=None, budget=None):
         self.graph = graph
         self.params = search_params
+        self.cancel_token = cancel_token
+        self.budget = budget
+        # Set when the search runs out of budget; the routes found so far are still returned.
+        # A cancelled search raises RequestCancelled instead, since nobody wants its routes.
+        self.stopped_reason = None
         self.found_routes = []
         self.target_distance = self.params.get('pathDistance', 1.0)
         self.max_routes_to_find = 10
@@ -24,11 +30,15 @@ class PathfindingEngine:
         all_nodes = list(self.graph.nodes(data=True))
         starting_nodes = random.sample(all_nodes, k=min(200, len(all_nodes))) # Increased starting points
 
-        for start_node_id, _ in starting_nodes:
-            if len(self.found_routes) >= self.max_routes_to_find:
-                break
-            
-            self._traverse(path=[start_node_id], current_distance=0.0)
+        try:
+            for start_node_id, _ in starting_nodes:
+                if len(self.found_routes) >= self.max_routes_to_find:
+                    break
+                
+                self._traverse(path=[start_node_id], current_distance=0.0)
+        except BudgetExceeded as e:
+            self.stopped_reason = str(e)
+            logging.warning(f"Pathfinding stopped early: {e}")
         
         logging.info(f"Pathfinding complete. Found {len(self.found_routes)} routes.")
         return self._format_routes()
@@ -42,6 +52,8 @@ class PathfindingEngine:
         if len(self.found_routes) >= self.max_routes_to_find:
             return
 
+        check_request(self.cancel_token, self.budget)
+
         last_node_id = path[-1]
         
         best_neighbor = None
@@ -0,0 +1,115 @@
+# core/request_control.py
+import threading
+import time
+
+
+class RequestCancelled(Exception):
+    """Raised when a search is cancelled, e.g. because a newer request superseded it."""
+
+    def __init__(self, reason="Request was cancelled"):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class BudgetExceeded(Exception):
+    """Raised when a search uses more of a resource than its budget allows."""
+
+    def __init__(self, resource, limit, used):
+        super().__init__(f"Budget exceeded for {resource}: {used} > {limit}")
+        self.resource = resource
+        self.limit = limit
+        self.used = used
+
+
+class CancellationToken:
+    """
+    A thread-safe flag shared between the endpoint and the pipeline stages.
+    Stages call check() at batch or loop boundaries and stop once it is set.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason="Request was cancelled"):
+        self.reason = reason
+        self._event.set()
+
+    @property
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise RequestCancelled(self.reason)
+
+    def wait(self, seconds):
+        """Sleeps for up to `seconds`, waking early if the token is cancelled."""
+        return self._event.wait(seconds)
+
+
+class RequestBudget:
+    """
+    Per-request resource limits. A limit of None means "unlimited".
+    The wall-time clock starts when the budget is created.
+    """
+
+    def __init__(self, max_nodes=None, max_elevation_points=None, max_wall_time_seconds=None):
+        self.max_nodes = max_nodes
+        self.max_elevation_points = max_elevation_points
+        self.max_wall_time_seconds = max_wall_time_seconds
+        self.started_at = time.monotonic()
+
+    def elapsed_seconds(self):
+        return time.monotonic() - self.started_at
+
+    def remaining_seconds(self):
+        if self.max_wall_time_seconds is None:
+            return None
+        return max(0.0, self.max_wall_time_seconds - self.elapsed_seconds())
+
+    def check_time(self):
+        if self.max_wall_time_seconds is not None:
+            elapsed = self.elapsed_seconds()
+            if elapsed >= self.max_wall_time_seconds:
+                raise BudgetExceeded("wall_time_seconds", self.max_wall_time_seconds, round(elapsed, 2))
+
+    def check_nodes(self, node_count):
+        if self.max_nodes is not None and node_count > self.max_nodes:
+            raise BudgetExceeded("nodes", self.max_nodes, node_count)
+
+    def check_elevation_points(self, point_count):
+        if self.max_elevation_points is not None and point_count > self.max_elevation_points:
+            raise BudgetExceeded("elevation_points", self.max_elevation_points, point_count)
+
+
+def check_request(cancel_token=None, budget=None):
+    """Convenience check for loop boundaries: raises if cancelled or out of time."""
+    if cancel_token is not None:
+        cancel_token.check()
+    if budget is not None:
+        budget.check_time()
+
+
+def request_timeout(budget=None):
+    """
+    Timeout for an outgoing HTTP call: the wall time left in the budget, or None
+    if there is no limit. Raises BudgetExceeded rather than return a zero timeout.
+    """
+    if budget is None or budget.max_wall_time_seconds is None:
+        return None
+    elapsed = budget.elapsed_seconds()
+    remaining = budget.max_wall_time_seconds - elapsed
+    if remaining <= 0:
+        raise BudgetExceeded("wall_time_seconds", budget.max_wall_time_seconds, round(elapsed, 2))
+    return remaining
+
+
+def raise_for_timeout(cancel_token=None, budget=None):
+    """
+    Called when an HTTP call made with request_timeout() times out. That timeout
+    was the rest of the wall-time budget, so the budget is spent.
+    """
+    check_request(cancel_token, budget)
+    if budget is not None and budget.max_wall_time_seconds is not None:
+        raise BudgetExceeded("wall_time_seconds", budget.max_wall_time_seconds, round(budget.elapsed_seconds(), 2))
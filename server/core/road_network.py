@@ -2,6 +2,7 @@
 import requests
 import networkx as nx
 import logging
+from core.request_control import check_request, raise_for_timeout, request_timeout
 from utils.geo_utils import haversine_distance, interpolate_point
 
 class OSMConnector:
@@ -9,7 +10,8 @@ class OSMConnector:
     def __init__(self):
         self.api_url = "https://overpass-api.de/api/interpreter"
 
-    def get_road_network(self, bounding_box):
+    def get_road_network(self, bounding_box, cancel_token=None, budget=None):
+        check_request(cancel_token, budget)
         bbox_str = f"{bounding_box[0]},{bounding_box[1]},{bounding_box[2]},{bounding_box[3]}"
         overpass_query = f"""
             [out:json];
@@ -18,17 +20,23 @@ class OSMConnector:
         """
         try:
             logging.info("Querying Overpass API for road network...")
-            response = requests.post(self.api_url, data={'data': overpass_query})
+            response = requests.post(self.api_url, data={'data': overpass_query}, timeout=request_timeout(budget))
             response.raise_for_status()
+            check_request(cancel_token, budget)
             logging.info("Successfully fetched road network data.")
             return response.json()
+        except requests.exceptions.Timeout as e:
+            raise_for_timeout(cancel_token, budget)
+            logging.error(f"Timed out fetching OSM data: {e}")
+            return None
         except requests.exceptions.RequestException as e:
             logging.error(f"Failed to fetch OSM data: {e}")
             return None
 
-def build_road_graph(osm_data, subdivision_distance_miles=0.031): # Approx 50 meters
+def build_road_graph(osm_data, subdivision_distance_miles=0.031, cancel_token=None, budget=None): # Approx 50 meters
     """
     Builds a high-resolution NetworkX graph from raw OSM data, subdividing long segments.
+    The cancel_token and node budget (if given) are checked after every way.
     """
     graph = nx.Graph()
     if not osm_data or 'elements' not in osm_data:
@@ -38,6 +46,10 @@ def build_road_graph(osm_data, subdivision_distance_miles=0.031): # Approx 50 me
     node_counter = 1_000_000_000 
 
     for element in osm_data['elements']:
+        check_request(cancel_token, budget)
+        if budget is not None:
+            budget.check_nodes(graph.number_of_nodes())
+
         if element['type'] == 'way':
             node_ids = element.get('nodes', [])
             geometry = element.get('geometry', [])
@@ -66,7 +78,7 @@ def build_road_graph(osm_data, subdivision_distance_miles=0.031): # Approx 50 me
                         interp_point = interpolate_point(node1_geom, node2_geom, fraction)
                         
                         new_node_id = node_counter
-                        graph.add_node(new_node_id, lat=interp_point['lat'], lon=interp_point['lon'])
+                        graph.add_node(new_node_id, lat=interp_point['lat'], lon=interp_point['lon'], interpolated=True)
                         
                         sub_segment_dist = haversine_distance(graph.nodes[last_node_in_segment], graph.nodes[new_node_id])
                         graph.add_edge(last_node_in_segment, new_node_id, weight=sub_segment_dist)
@@ -83,5 +95,8 @@ def build_road_graph(osm_data, subdivision_distance_miles=0.031): # Approx 50 me
                     graph.add_node(node2_id, lat=node2_geom['lat'], lon=node2_geom['lon'])
                     graph.add_edge(node1_id, node2_id, weight=segment_distance)
 
+    if budget is not None:
+        budget.check_nodes(graph.number_of_nodes())
+
     logging.info(f"Built high-resolution graph with {graph.number_of_nodes()} nodes and {graph.number_of_edges()} edges.")
     return graph
\ No newline at end of file
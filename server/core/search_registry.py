@@ -0,0 +1,176 @@
+# core/search_registry.py
+import logging
+import threading
+import time
+
+import psycopg2
+
+from core.request_control import CancellationToken
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS active_searches (
+        client_id  TEXT PRIMARY KEY,
+        search_id  TEXT NOT NULL,
+        started_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+"""
+
+
+class SearchRegistry:
+    """
+    Tracks the in-flight search of each client (one per browser tab) so a new
+    search can supersede the old one and a client can cancel its own search.
+    This base class only sees searches running in the current process.
+    """
+
+    def __init__(self):
+        self._searches = {}
+        self._lock = threading.Lock()
+
+    def register(self, client_id, search_id):
+        """Returns the new search's token, cancelling the client's previous search."""
+        token = CancellationToken()
+        if not client_id:
+            # Callers that don't identify themselves can't be superseded or cancelled
+            return token
+        with self._lock:
+            previous = self._searches.get(client_id)
+            self._searches[client_id] = (search_id, token)
+        if previous is not None:
+            previous[1].cancel("Superseded by a newer search")
+        return token
+
+    def unregister(self, client_id, search_id, token):
+        if not client_id:
+            return
+        with self._lock:
+            entry = self._searches.get(client_id)
+            if entry is not None and entry[1] is token:
+                del self._searches[client_id]
+
+    def active_search_id(self, client_id):
+        """The search this process is running for the client, or None."""
+        with self._lock:
+            entry = self._searches.get(client_id)
+        return entry[0] if entry is not None else None
+
+    def cancel(self, client_id, search_id):
+        """Cancels the client's search if it is still search_id. Returns True if it was."""
+        with self._lock:
+            entry = self._searches.get(client_id)
+        if entry is None or entry[0] != search_id:
+            return False
+        entry[1].cancel("Cancelled by client")
+        return True
+
+
+class PostgresSearchRegistry(SearchRegistry):
+    """
+    A SearchRegistry shared by every worker and instance through one row per
+    client in the active_searches table. A search is cancelled once its client's
+    row names a different search (superseded) or is gone (cancelled). A
+    background thread polls the table for this process's searches, so
+    check_request() itself stays a cheap in-memory check.
+    """
+
+    def __init__(self, dsn, poll_interval_seconds=0.5):
+        super().__init__()
+        self.dsn = dsn
+        self.poll_interval_seconds = poll_interval_seconds
+        self._conn = None
+        self._conn_lock = threading.Lock()
+        # Searches whose row could not be written; the poller leaves them alone
+        self._unshared = set()
+        self._execute(SCHEMA_SQL)
+        self._poller = threading.Thread(target=self._poll_forever, name="search-registry-poller", daemon=True)
+        self._poller.start()
+
+    def _execute(self, sql, params=None):
+        """Runs one autocommitted statement, reconnecting after a dropped connection."""
+        with self._conn_lock:
+            if self._conn is None or self._conn.closed:
+                self._conn = psycopg2.connect(self.dsn)
+                self._conn.autocommit = True
+            try:
+                with self._conn.cursor() as cur:
+                    cur.execute(sql, params)
+                    return cur.fetchall() if cur.description else cur.rowcount
+            except psycopg2.OperationalError:
+                self._conn.close()
+                raise
+
+    def register(self, client_id, search_id):
+        # Write the row before registering locally, so the poller never sees
+        # the new search without its row and cancels it.
+        if client_id:
+            try:
+                self._execute(
+                    """
+                    INSERT INTO active_searches (client_id, search_id) VALUES (%s, %s)
+                    ON CONFLICT (client_id) DO UPDATE SET search_id = EXCLUDED.search_id, started_at = now()
+                    """,
+                    (client_id, search_id),
+                )
+            except psycopg2.Error as e:
+                logging.error(f"Could not share search {search_id}; only this worker can cancel it: {e}")
+                with self._lock:
+                    self._unshared.add((client_id, search_id))
+        return super().register(client_id, search_id)
+
+    def unregister(self, client_id, search_id, token):
+        super().unregister(client_id, search_id, token)
+        with self._lock:
+            self._unshared.discard((client_id, search_id))
+        if client_id:
+            try:
+                self._execute(
+                    "DELETE FROM active_searches WHERE client_id = %s AND search_id = %s",
+                    (client_id, search_id),
+                )
+            except psycopg2.Error as e:
+                logging.error(f"Could not remove finished search {search_id}: {e}")
+
+    def cancel(self, client_id, search_id):
+        cancelled_here = super().cancel(client_id, search_id)
+        try:
+            deleted = self._execute(
+                "DELETE FROM active_searches WHERE client_id = %s AND search_id = %s",
+                (client_id, search_id),
+            )
+        except psycopg2.Error as e:
+            logging.error(f"Could not share cancellation of search {search_id}: {e}")
+            return cancelled_here
+        return cancelled_here or deleted > 0
+
+    def _poll_forever(self):
+        while True:
+            time.sleep(self.poll_interval_seconds)
+            try:
+                self._cancel_stale_searches()
+            except psycopg2.Error as e:
+                logging.error(f"Search registry poll failed: {e}")
+
+    def _cancel_stale_searches(self):
+        with self._lock:
+            local = {
+                client_id: entry for client_id, entry in self._searches.items()
+                if (client_id, entry[0]) not in self._unshared
+            }
+        if not local:
+            return
+
+        rows = self._execute(
+            "SELECT client_id, search_id FROM active_searches WHERE client_id = ANY(%s)",
+            (list(local),),
+        )
+        current = dict(rows)
+        for client_id, (search_id, token) in local.items():
+            current_id = current.get(client_id)
+            if current_id == search_id:
+                continue
+            # Re-check locally: the search may have finished or been replaced here
+            # since the snapshot, in which case its row is legitimately gone.
+            with self._lock:
+                still_running = self._searches.get(client_id) == (search_id, token)
+            if still_running:
+                token.cancel("Superseded by a newer search" if current_id else "Cancelled by client")
@@ -0,0 +1,166 @@
+# server/tests/test_graph_store.py
+import sys
+import os
+import logging
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import networkx as nx
+import psycopg2
+
+import core.data_pipeline as data_pipeline
+from core.graph_store import INTERPOLATED_NODE_TAG, PostgresGraphStore, boxes_cover
+from core.pathfinder import PathfindingEngine
+from core.road_network import build_road_graph
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Steps 2-4 need a local PostgreSQL database (no extensions required), e.g.
+#   createdb running_routes_test
+#   GRAPH_STORE_DSN="dbname=running_routes_test" python tests/test_graph_store.py
+# The test clears every table in that database, so never point it at real data.
+DSN = os.environ.get('GRAPH_STORE_DSN', 'dbname=running_routes_test host=localhost user=postgres')
+
+# A small hand-made road network so the test does not depend on the Overpass API.
+# Way 1 runs north along a hill. Way 3 is a bridge crossing over way 1: its
+# middle node sits on node 2's coordinate but the ways are not connected.
+# Way 2 is far outside the test bounding box.
+OSM_DATA = {'elements': [
+    {'type': 'way', 'nodes': [1, 2, 3], 'geometry': [
+        {'lat': 36.5000, 'lon': -82.5300},
+        {'lat': 36.5010, 'lon': -82.5300},
+        {'lat': 36.5020, 'lon': -82.5300},
+    ]},
+    {'type': 'way', 'nodes': [6, 7, 8], 'geometry': [
+        {'lat': 36.5010, 'lon': -82.5305},
+        {'lat': 36.5010, 'lon': -82.5300},
+        {'lat': 36.5010, 'lon': -82.5295},
+    ]},
+    {'type': 'way', 'nodes': [4, 5], 'geometry': [
+        {'lat': 36.6000, 'lon': -82.6000},
+        {'lat': 36.6010, 'lon': -82.6000},
+    ]},
+]}
+
+
+def elevation_for(lat):
+    return (lat - 36.5) * 100_000 * 0.02  # steady ~2% climb
+
+
+class RecordingStore:
+    """Stands in for the store in the pipeline checks; can fail like a DB outage."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.saved = []
+
+    def covers(self, bounding_box):
+        if self.fail:
+            raise psycopg2.OperationalError("could not connect to server")
+        return False
+
+    def save_graph(self, graph, bounding_box):
+        if self.fail:
+            raise psycopg2.OperationalError("could not connect to server")
+        self.saved.append(graph)
+
+
+def run_pipeline(graph_store, drop_every_other_elevation=False):
+    """Runs prepare_data_for_pathfinding on OSM_DATA without touching the network."""
+    real_osm = data_pipeline.OSMConnector.get_road_network
+    real_elevation = data_pipeline.ElevationConnector.fetch_elevation_for_coords
+
+    def fake_elevation(self, coordinates, cancel_token=None, budget=None):
+        results = [
+            {'latitude': c['latitude'], 'longitude': c['longitude'], 'elevation': elevation_for(c['latitude'])}
+            for c in coordinates
+        ]
+        # Mimics a failed batch: fetch_elevation_for_coords returns what it has so far
+        return results[::2] if drop_every_other_elevation else results
+
+    data_pipeline.OSMConnector.get_road_network = lambda self, bbox, cancel_token=None, budget=None: OSM_DATA
+    data_pipeline.ElevationConnector.fetch_elevation_for_coords = fake_elevation
+    try:
+        return data_pipeline.prepare_data_for_pathfinding(
+            {'origin': {'lat': 36.5, 'lng': -82.53}}, graph_store=graph_store
+        )
+    finally:
+        data_pipeline.OSMConnector.get_road_network = real_osm
+        data_pipeline.ElevationConnector.fetch_elevation_for_coords = real_elevation
+
+
+if __name__ == '__main__':
+    print("--- Step 1: Pipeline integration (no database needed) ---")
+    graph = run_pipeline(RecordingStore(fail=True))
+    assert graph is not None and graph.number_of_nodes() > 0
+    print("✅ A failing graph store falls back to fresh data.")
+
+    store = RecordingStore()
+    run_pipeline(store, drop_every_other_elevation=True)
+    assert store.saved == []
+    print("✅ Graphs with missing elevations are not saved.")
+
+    run_pipeline(store)
+    assert len(store.saved) == 1
+    print("✅ Complete graphs are saved.")
+
+    assert boxes_cover([(0, 0, 1, 1), (0, 1, 1, 2)], (0.2, 0.5, 0.8, 1.5))
+    assert not boxes_cover([(0, 0, 1, 1), (0, 1.1, 1, 2)], (0.2, 0.5, 0.8, 1.5))
+    assert not boxes_cover([], (0.2, 0.5, 0.8, 1.5))
+    print("✅ Coverage is checked against the union of saved areas.")
+
+    graph = build_road_graph(OSM_DATA)
+    for node_id, data in graph.nodes(data=True):
+        data['elevation'] = elevation_for(data['lat'])
+
+    test_bbox = (36.49, -82.54, 36.51, -82.52)  # (south, west, north, east)
+    saved_bbox = (36.40, -82.70, 36.70, -82.40)
+    inside_nodes = [n for n, d in graph.nodes(data=True)
+                    if test_bbox[0] <= d['lat'] <= test_bbox[2] and test_bbox[1] <= d['lon'] <= test_bbox[3]]
+    expected_edges = graph.subgraph(inside_nodes).number_of_edges()
+    assert inside_nodes and expected_edges
+
+    store = PostgresGraphStore(DSN, fetch_batch_size=2)
+    store.create_schema()
+    store.clear()
+
+    print("\n--- Step 2: Saving graph to the store ---")
+    assert not store.covers(test_bbox), "Empty store reported coverage for the test area"
+    store.save_graph(graph, bounding_box=saved_bbox)
+    # Saving the same area twice must not fail on the shared primary keys
+    store.save_graph(graph, bounding_box=saved_bbox)
+    assert store.covers(test_bbox), "Store does not report coverage for the test area"
+    assert not store.covers((36.0, -83.0, 37.0, -82.0)), "Store reported coverage beyond the saved area"
+    # A search box straddling two saved areas is covered by their union
+    store.save_graph(nx.Graph(), bounding_box=(36.70, -82.70, 36.90, -82.40))
+    assert store.covers((36.60, -82.60, 36.80, -82.50)), "Union of saved areas does not cover the bbox"
+    print("✅ Coverage matches the saved areas.")
+
+    print("\n--- Step 3: Loading bbox subgraph ---")
+    subgraph = store.load_subgraph(test_bbox)
+    assert subgraph.number_of_nodes() == len(inside_nodes), \
+        f"Loaded {subgraph.number_of_nodes()} nodes, expected {len(inside_nodes)}"
+    assert subgraph.number_of_edges() == expected_edges, \
+        f"Loaded {subgraph.number_of_edges()} edges, expected {expected_edges}"
+    for node_id, data in subgraph.nodes(data=True):
+        assert abs(data['elevation'] - elevation_for(data['lat'])) < 1e-6
+    for node1_id, node2_id, data in subgraph.edges(data=True):
+        assert data['weight'] > 0
+    osm_ids = {n for n, d in graph.nodes(data=True) if not d.get('interpolated')}
+    for node_id in subgraph.nodes:
+        assert node_id in osm_ids or node_id & INTERPOLATED_NODE_TAG
+    assert 2 in subgraph and 7 in subgraph and not subgraph.has_edge(2, 7)
+    assert nx.number_connected_components(subgraph) == \
+        nx.number_connected_components(graph.subgraph(inside_nodes)), "Store merged separate ways"
+    print(f"✅ Loaded {subgraph.number_of_nodes()} nodes and {subgraph.number_of_edges()} edges, matching the source graph.")
+
+    print("\n--- Step 4: Running Pathfinding Engine on the stored subgraph ---")
+    engine = PathfindingEngine(graph=subgraph, search_params={'pathDistance': 0.05, 'optimalIncline': 2.0})
+    found_routes = engine.find_routes()
+    assert found_routes, "No routes found on the stored subgraph"
+    print(f"✅ Engine found {len(found_routes)} routes on the stored subgraph.")
+
+    store.clear()
+    store.close()
+    print("\n--- Test Complete ---")
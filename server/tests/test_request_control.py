@@ -0,0 +1,218 @@
+# server/tests/test_request_control.py
+import sys
+import os
+import logging
+import threading
+import time
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+import app as app_module
+import core.data_fetcher as data_fetcher
+from core.data_fetcher import ElevationConnector
+from core.pathfinder import PathfindingEngine
+from core.request_control import (
+    BudgetExceeded, CancellationToken, RequestBudget, RequestCancelled, request_timeout
+)
+from core.road_network import build_road_graph
+from core.search_registry import PostgresSearchRegistry
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# A small hand-made road network so the test does not depend on the Overpass API
+OSM_DATA = {'elements': [
+    {'type': 'way', 'nodes': [1, 2, 3], 'geometry': [
+        {'lat': 36.5000, 'lon': -82.5300},
+        {'lat': 36.5010, 'lon': -82.5300},
+        {'lat': 36.5020, 'lon': -82.5300},
+    ]},
+    {'type': 'way', 'nodes': [3, 4], 'geometry': [
+        {'lat': 36.5020, 'lon': -82.5300},
+        {'lat': 36.5020, 'lon': -82.5310},
+    ]},
+]}
+
+
+def build_enriched_graph():
+    graph = build_road_graph(OSM_DATA)
+    for _, data in graph.nodes(data=True):
+        data['elevation'] = (data['lat'] - 36.5) * 100_000 * 0.02  # steady ~2% climb
+    return graph
+
+
+def expect_raises(exception_type, func, *args, **kwargs):
+    try:
+        func(*args, **kwargs)
+    except exception_type as e:
+        return e
+    raise AssertionError(f"Expected {exception_type.__name__} to be raised")
+
+
+def post_find_routes(client, params, results, key):
+    results[key] = client.post('/api/find-routes', json=params)
+
+
+if __name__ == '__main__':
+    print("--- Step 1: Pipeline stages stop on cancellation and budgets ---")
+    token = CancellationToken()
+    token.cancel("Superseded by a newer search")
+    e = expect_raises(RequestCancelled, build_road_graph, OSM_DATA, cancel_token=token)
+    assert e.reason == "Superseded by a newer search"
+    print("✅ build_road_graph stops on a cancelled token.")
+
+    e = expect_raises(BudgetExceeded, build_road_graph, OSM_DATA, budget=RequestBudget(max_nodes=2))
+    assert e.resource == "nodes"
+    print("✅ build_road_graph stops when the node budget is exceeded.")
+
+    e = expect_raises(BudgetExceeded, ElevationConnector().fetch_elevation_for_coords,
+                      [{'latitude': 36.5, 'longitude': -82.53}] * 3,
+                      budget=RequestBudget(max_elevation_points=2))
+    assert e.resource == "elevation_points"
+    print("✅ ElevationConnector refuses requests over the elevation point budget.")
+
+    # A timed-out elevation call means the wall-time budget ran out; it must not
+    # come back as partial results.
+    def timing_out_post(*args, timeout=None, **kwargs):
+        time.sleep(timeout)
+        raise requests.exceptions.Timeout("Read timed out")
+    real_post = data_fetcher.requests.post
+    data_fetcher.requests.post = timing_out_post
+    try:
+        e = expect_raises(BudgetExceeded, ElevationConnector().fetch_elevation_for_coords,
+                          [{'latitude': 36.5, 'longitude': -82.53}],
+                          budget=RequestBudget(max_wall_time_seconds=0.2))
+    finally:
+        data_fetcher.requests.post = real_post
+    assert e.resource == "wall_time_seconds"
+    print("✅ An HTTP timeout caused by the time budget raises BudgetExceeded.")
+
+    e = expect_raises(BudgetExceeded, request_timeout, RequestBudget(max_wall_time_seconds=0))
+    assert e.resource == "wall_time_seconds"
+    assert request_timeout(None) is None
+    print("✅ request_timeout never returns a zero timeout.")
+
+    engine = PathfindingEngine(build_enriched_graph(), {'pathDistance': 0.05}, cancel_token=token)
+    expect_raises(RequestCancelled, engine.find_routes)
+    print("✅ PathfindingEngine lets RequestCancelled propagate.")
+
+    budget = RequestBudget(max_wall_time_seconds=0)
+    engine = PathfindingEngine(build_enriched_graph(), {'pathDistance': 0.05}, budget=budget)
+    routes = engine.find_routes()
+    assert routes == [] and engine.stopped_reason
+    print("✅ PathfindingEngine returns partial results when out of time.")
+
+    print("\n--- Step 2: Endpoint responses ---")
+    client = app_module.app.test_client()
+    real_prepare = app_module.prepare_data_for_pathfinding
+
+    # 422 when data preparation goes over budget
+    def over_budget_prepare(search_params, cancel_token=None, budget=None, graph_store=None):
+        budget.check_nodes(budget.max_nodes + 1)
+    app_module.prepare_data_for_pathfinding = over_budget_prepare
+    response = client.post('/api/find-routes', json={'clientId': 'tab-a', 'searchId': 's1'})
+    assert response.status_code == 422, response.status_code
+    assert response.json['status'] == 'over_budget' and response.json['resource'] == 'nodes'
+    print("✅ /api/find-routes returns 422 when over budget.")
+
+    # 200 "partial" when pathfinding runs out of time
+    real_max_seconds = app_module.MAX_REQUEST_SECONDS
+    app_module.MAX_REQUEST_SECONDS = 0.2
+    def slow_prepare(search_params, cancel_token=None, budget=None, graph_store=None):
+        time.sleep(0.3)
+        return build_enriched_graph()
+    app_module.prepare_data_for_pathfinding = slow_prepare
+    response = client.post('/api/find-routes', json={'clientId': 'tab-a', 'searchId': 's2', 'pathDistance': 0.05})
+    app_module.MAX_REQUEST_SECONDS = real_max_seconds
+    assert response.status_code == 200, response.status_code
+    assert response.json['status'] == 'partial'
+    print("✅ /api/find-routes returns a partial result when pathfinding runs out of time.")
+
+    # 409 when a search is superseded or cancelled; waits until its token is cancelled
+    def blocking_prepare(search_params, cancel_token=None, budget=None, graph_store=None):
+        cancel_token.wait(5)
+        cancel_token.check()
+        return build_enriched_graph()
+    app_module.prepare_data_for_pathfinding = blocking_prepare
+
+    def wait_until_registered(client_id, search_id):
+        for _ in range(100):
+            if app_module.search_registry.active_search_id(client_id) == search_id:
+                return
+            time.sleep(0.05)
+        raise AssertionError(f"Search {search_id} was never registered")
+
+    results = {}
+    first = threading.Thread(target=post_find_routes, args=(
+        app_module.app.test_client(), {'clientId': 'tab-a', 'searchId': 's3'}, results, 's3'))
+    other_tab = threading.Thread(target=post_find_routes, args=(
+        app_module.app.test_client(), {'clientId': 'tab-b', 'searchId': 's4'}, results, 's4'))
+    first.start()
+    other_tab.start()
+    wait_until_registered('tab-a', 's3')
+    wait_until_registered('tab-b', 's4')
+
+    second = threading.Thread(target=post_find_routes, args=(
+        app_module.app.test_client(), {'clientId': 'tab-a', 'searchId': 's5'}, results, 's5'))
+    second.start()
+    first.join()
+    assert results['s3'].status_code == 409 and results['s3'].json['status'] == 'cancelled'
+    print("✅ A newer search from the same tab supersedes the old one with 409.")
+
+    # A stale cancel for the superseded search must not touch the newer one
+    response = client.post('/api/cancel-search', json={'clientId': 'tab-a', 'searchId': 's3'})
+    assert response.json['status'] == 'no_active_search'
+    response = client.post('/api/cancel-search', json={'clientId': 'tab-a'})
+    assert response.status_code == 400
+    response = client.post('/api/cancel-search', json={'clientId': 'tab-a', 'searchId': 's5'})
+    assert response.json['status'] == 'cancelled'
+    second.join()
+    assert results['s5'].status_code == 409
+    print("✅ /api/cancel-search cancels only the matching search.")
+
+    # The other tab's search was never affected
+    assert other_tab.is_alive()
+    client.post('/api/cancel-search', json={'clientId': 'tab-b', 'searchId': 's4'})
+    other_tab.join()
+    print("✅ Searches from other tabs keep running.")
+
+    app_module.prepare_data_for_pathfinding = real_prepare
+
+    # Step 3 needs a local PostgreSQL database, e.g.
+    #   SEARCH_REGISTRY_DSN="dbname=running_routes_test" python tests/test_request_control.py
+    print("\n--- Step 3: Cancellation shared between workers ---")
+    dsn = os.environ.get('SEARCH_REGISTRY_DSN')
+    if not dsn:
+        print("⚠️ Skipped: set SEARCH_REGISTRY_DSN to run against a local PostgreSQL.")
+    else:
+        # Two registries on one database stand in for two gunicorn workers
+        worker_a = PostgresSearchRegistry(dsn, poll_interval_seconds=0.1)
+        worker_b = PostgresSearchRegistry(dsn, poll_interval_seconds=0.1)
+
+        old_token = worker_a.register('tab-c', 's6')
+        new_token = worker_b.register('tab-c', 's7')
+        assert old_token.wait(2), "Search on worker A was not superseded by worker B"
+        assert old_token.reason == "Superseded by a newer search"
+        assert not new_token.is_cancelled
+        worker_a.unregister('tab-c', 's6', old_token)
+        print("✅ A newer search on another worker supersedes the old one.")
+
+        assert not worker_a.cancel('tab-c', 's6'), "A stale cancel matched the newer search"
+        time.sleep(0.3)
+        assert not new_token.is_cancelled
+        assert worker_a.cancel('tab-c', 's7')
+        assert new_token.wait(2), "Cancel sent to worker A did not reach worker B"
+        assert new_token.reason == "Cancelled by client"
+        worker_b.unregister('tab-c', 's7', new_token)
+        print("✅ /api/cancel-search reaches a search running on another worker.")
+
+        token = worker_a.register('tab-d', 's8')
+        time.sleep(0.3)
+        assert not token.is_cancelled, "The poller cancelled a search that is still current"
+        worker_a.unregister('tab-d', 's8', token)
+        assert not worker_b.cancel('tab-d', 's8')
+        print("✅ Current and finished searches are left alone.")
+
+    print("\n--- Test Complete ---")